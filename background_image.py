@@ -1,4 +1,6 @@
 import glob
+import os
+import select
 import subprocess
 import logging
 import time
@@ -7,26 +9,25 @@ import time
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def wait_for_usb_mount(mount_path="/media/usb", timeout=30):
-    start_time = time.time()
+    deadline = time.monotonic() + timeout
     logging.info(f"Waiting for USB mount at {mount_path}...")
 
-    while True:
-        try:
-            with open("/proc/mounts", "r") as mounts:
-                mounted = any(mount_path in line for line in mounts)
-        except Exception as e:
-            logging.error(f"Error checking mounts: {e}")
-            mounted = False
+    # /proc/self/mounts raises POLLPRI on every mount table change, so we
+    # re-check only when something was (un)mounted instead of once a second
+    with open("/proc/self/mounts") as mounts:
+        poller = select.poll()
+        poller.register(mounts, select.POLLPRI)
+        while True:
+            if os.path.ismount(mount_path):
+                logging.info("USB is mounted.")
+                return True
 
-        if mounted:
-            logging.info("USB is mounted.")
-            return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.error(f"ERROR: USB not mounted after {timeout} seconds.")
+                return False
 
-        if time.time() - start_time > timeout:
-            logging.error(f"ERROR: USB not mounted after {timeout} seconds.")
-            return False
-
-        time.sleep(1)
+            poller.poll(remaining * 1000)
 
 if __name__ == "__main__":
     if not wait_for_usb_mount():
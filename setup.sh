@@ -10,7 +10,9 @@ sudo apt-get install -y mosquito
 sudo apt-get install -y mosquito-clients
 sudo apt install -y python3-paho-mqtt
 sudo apt install -y python3-vlc
+sudo apt install -y python3-inotify-simple
 sudo apt install -y python3-flasksudo
+sudo apt install -y python3-waitress
 sudo apt install -y mosquitto
 sudo apt install -y mosquitto-clients
 
@@ -1,17 +1,38 @@
 from flask import Flask, jsonify, request, Response
+import logging
+import math
 import os
+import struct
 import paho.mqtt.client as mqtt
+import socket
 import threading
 import time
 
+try:
+    from waitress import serve
+except ImportError:  # fall back to Flask's built-in server
+    serve = None
+
 # CONFIG
 VIDEO_DIR = "/media/usb"
 MQTT_BROKER = "192.168.50.1"
+MQTT_KEEPALIVE = 15  # seconds
+MQTT_RECONNECT_MIN_DELAY = 1  # seconds, doubling up to the max between attempts
+MQTT_RECONNECT_MAX_DELAY = 8
 MQTT_TOPIC_PLAY = "video/play"
-MQTT_TOPIC_HEARTBEAT = "clients/status"
-HEARTBEAT_TIMEOUT = 10  # seconds
+MQTT_TOPIC_PLAY_BATCH = "video/play_batch"
+MQTT_TOPIC_HEARTBEAT = "clients/online/+"  # payload 1 = alive, 0 = last will
+HEARTBEAT_TIMEOUT = 75  # seconds, 2.5 client heartbeat intervals
+CLEANUP_INTERVAL = 5  # seconds between sweeps for clients past the timeout
+HTTP_THREADS = 8  # concurrent web requests; all share the one MQTT client
+MAX_BATCH = 255  # entry count is sent as a single byte
+MAX_BATCH_DELAY = 3600  # seconds; clients clamp anything further out to this
+PLAY_ENTRY = struct.Struct("!Id")  # video index, start time
+
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.flv', '.wmv', '.webm', '.mpeg', '.mpg', '.ts'})
 
-VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.flv', '.wmv', '.webm', '.mpeg', '.mpg', '.ts')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger("brain")
 
 app = Flask(__name__)
 mqtt_client = mqtt.Client()
@@ -21,30 +42,44 @@ clients_last_seen = {}
 
 def update_video_list():
     global video_files
-    video_files = sorted(
-        [f for f in os.listdir(VIDEO_DIR) if f.lower().endswith(VIDEO_EXTENSIONS)]
-    )
-    print(f"Found videos: {video_files}")
+    # Rescanned on every page load: the vfat root's mtime never changes, so it
+    # can't tell us when files were added. Same filter as the client, so both
+    # sides agree on every index.
+    with os.scandir(VIDEO_DIR) as it:
+        files = sorted(
+            e.name for e in it
+            if os.path.splitext(e.name)[1].lower() in VIDEO_EXTENSIONS and e.is_file()
+        )
+    if files != video_files:
+        video_files = files
+        log.info("Found videos: %s", video_files)
 
 def on_connect(client, userdata, flags, rc):
-    print("Connected to MQTT Broker")
+    log.info("Connected to MQTT Broker")
+    # Play commands are single small packets; send them without waiting on Nagle
+    sock = client.socket()
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     client.subscribe(MQTT_TOPIC_HEARTBEAT)
 
 def on_message(client, userdata, msg):
-    client_id = msg.payload.decode()
-    clients_last_seen[client_id] = time.time()
+    client_id = msg.topic.rsplit("/", 1)[1]
+    if msg.payload == b"\x00":
+        clients_last_seen.pop(client_id, None)
+    else:
+        clients_last_seen[client_id] = time.monotonic()
 
 def cleanup_clients():
     while True:
-        now = time.time()
+        now = time.monotonic()
         to_remove = []
-        for cid, last in clients_last_seen.items():
+        for cid, last in list(clients_last_seen.items()):
             if now - last > HEARTBEAT_TIMEOUT:
-                print(f"Removing inactive client: {cid}")
+                log.info("Removing inactive client: %s", cid)
                 to_remove.append(cid)
         for cid in to_remove:
-            del clients_last_seen[cid]
-        time.sleep(HEARTBEAT_TIMEOUT)
+            clients_last_seen.pop(cid, None)  # a last will may have removed it already
+        time.sleep(CLEANUP_INTERVAL)
 
 @app.route("/")
 def index():
@@ -142,15 +177,52 @@ def index():
 """
     return Response(html, mimetype="text/html")
 
+def is_valid_index(video_index):
+    # bool is an int subclass, and floats or strings can't be packed as an index
+    return (isinstance(video_index, int) and not isinstance(video_index, bool)
+            and 0 <= video_index < len(video_files))
+
+def is_valid_delay(delay):
+    return (isinstance(delay, (int, float)) and not isinstance(delay, bool)
+            and math.isfinite(delay) and 0 <= delay <= MAX_BATCH_DELAY)
+
 @app.route("/play", methods=["POST"])
 def play():
-    data = request.json
-    video_index = data.get("index")
-    if video_index is None or not (0 <= video_index < len(video_files)):
+    data = request.get_json(silent=True)
+    video_index = data.get("index") if isinstance(data, dict) else None
+    if not is_valid_index(video_index):
         return jsonify({"status": "error", "message": "Invalid video index"}), 400
     start_time = time.time() + 2  # 2 seconds delay to allow clients to prepare
-    mqtt_client.publish(MQTT_TOPIC_PLAY, f"{video_index},{start_time}", retain=False)
-    print(f"Published play command: {video_index},{start_time}")
+    # QoS 0 publishes made while disconnected are dropped, not queued
+    result = mqtt_client.publish(MQTT_TOPIC_PLAY, PLAY_ENTRY.pack(video_index, start_time), retain=False)
+    if result.rc != mqtt.MQTT_ERR_SUCCESS:
+        return jsonify({"status": "error", "message": "Not connected to MQTT broker"}), 503
+    log.info("Published play command: %s,%s", video_index, start_time)
+    return jsonify({"status": "success"})
+
+@app.route("/play_batch", methods=["POST"])
+def play_batch():
+    # Body: {"entries": [[index, delay_seconds], ...]}, sent to clients as one message
+    data = request.get_json(silent=True)
+    entries = data.get("entries") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not (0 < len(entries) <= MAX_BATCH):
+        return jsonify({"status": "error", "message": "Invalid batch size"}), 400
+    now = time.time() + 2  # same preparation delay as /play
+    payload = bytearray(1 + len(entries) * PLAY_ENTRY.size)
+    payload[0] = len(entries)
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, list) or len(entry) != 2:
+            return jsonify({"status": "error", "message": "Invalid batch entry"}), 400
+        video_index, delay = entry
+        if not is_valid_index(video_index):
+            return jsonify({"status": "error", "message": "Invalid video index"}), 400
+        if not is_valid_delay(delay):
+            return jsonify({"status": "error", "message": "Invalid delay"}), 400
+        PLAY_ENTRY.pack_into(payload, 1 + i * PLAY_ENTRY.size, video_index, now + delay)
+    result = mqtt_client.publish(MQTT_TOPIC_PLAY_BATCH, payload, retain=False)
+    if result.rc != mqtt.MQTT_ERR_SUCCESS:
+        return jsonify({"status": "error", "message": "Not connected to MQTT broker"}), 503
+    log.info("Published play batch of %d entries", len(entries))
     return jsonify({"status": "success"})
 
 @app.route("/clients/count")
@@ -161,9 +233,10 @@ if __name__ == "__main__":
     update_video_list()
     mqtt_client.on_connect = on_connect
     mqtt_client.on_message = on_message
-    mqtt_client.connect(MQTT_BROKER, 1883, 60)
+    mqtt_client.reconnect_delay_set(MQTT_RECONNECT_MIN_DELAY, MQTT_RECONNECT_MAX_DELAY)
+    mqtt_client.connect_async(MQTT_BROKER, 1883, MQTT_KEEPALIVE)
 
-    mqtt_thread = threading.Thread(target=mqtt_client.loop_forever)
+    mqtt_thread = threading.Thread(target=mqtt_client.loop_forever, kwargs={"retry_first_connection": True})
     mqtt_thread.daemon = True
     mqtt_thread.start()
 
@@ -171,4 +244,8 @@ if __name__ == "__main__":
     cleanup_thread.daemon = True
     cleanup_thread.start()
 
-    app.run(host="0.0.0.0", port=5000)
+    if serve is not None:
+        serve(app, host="0.0.0.0", port=5000, threads=HTTP_THREADS)
+    else:
+        log.warning("waitress not installed, using Flask's development server")
+        app.run(host="0.0.0.0", port=5000, threaded=True)
@@ -1,173 +1,502 @@
+import atexit
+import bisect
+import heapq
+import itertools
+import logging
+import logging.handlers
+import math
 import os
+import queue
+import select
+import socket
+import struct
 import time
 import threading
 import paho.mqtt.client as mqtt
 import vlc
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 from datetime import datetime
 import uuid
 
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
 VIDEO_DIR = "/media/usb"
 MQTT_BROKER = "192.168.50.1"
+MQTT_KEEPALIVE = 15  # seconds; a dead broker link is noticed within ~1.5x this
+MQTT_RECONNECT_MIN_DELAY = 1  # seconds, doubling up to the max between attempts
+MQTT_RECONNECT_MAX_DELAY = 8
 MQTT_TOPIC_PLAY = "video/play"
-MQTT_TOPIC_HEARTBEAT = "clients/status"
-HEARTBEAT_INTERVAL = 5  # seconds
+MQTT_TOPIC_PLAY_BATCH = "video/play_batch"
+MQTT_TOPIC_HEARTBEAT = "clients/online"
+HEARTBEAT_INTERVAL = 30  # seconds; crashes and dropped links are reported sooner by the last will
+PLAY_START_TIMEOUT = 2.0  # seconds to wait for VLC to report playback
+MAX_PENDING_PLAYS = 1024  # scheduled plays kept; a runaway publisher can't grow memory past this
+MAX_SCHEDULE_AHEAD = 3600  # seconds; later start times are pulled in to this
+START_SPIN = 0.002  # seconds before a deadline to stop sleeping and busy-wait
+PREPARE_LEAD = 3.0  # seconds before a deadline to prefetch and parse its video
+LOOP_RETRY_INTERVAL = 5  # seconds between attempts when the index 0 video is unavailable
+# Player thread, and the VLC threads it starts, outrank MQTT and heartbeats.
+# A negative niceness needs root or CAP_SYS_NICE, hence root's crontab.
+PLAYER_NICE = -10
+PREFETCH_BYTES = 8 << 20  # head of a video to pull into the page cache ahead of playback
+
+# Per-command messages are logged at DEBUG; set to logging.DEBUG when troubleshooting sync
+LOG_LEVEL = logging.INFO
+
+# Prefer rendering straight to a DRM/KMS plane, falling back to any other vout
+# if drm_vout is unavailable, and skip the audio output chain, X11 probing and
+# title overlay.
+# Files come from local USB and are prefetched, so VLC's input buffering is off.
+# Override with VLC_OPTS for boards that need a different output.
+VLC_ARGS = os.environ.get('VLC_OPTS', '--no-audio --no-xlib --vout=drm_vout,any --no-video-title-show --no-osd --file-caching=0')
+
+# Must match the brain's list, since play commands refer to videos by sorted index
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.flv', '.wmv', '.webm', '.mpeg', '.mpg', '.ts'})
 
 CLIENT_ID = str(uuid.getnode())
+# The client id travels in the topic so each heartbeat is a single byte
+HEARTBEAT_TOPIC = f"{MQTT_TOPIC_HEARTBEAT}/{CLIENT_ID}"
+HEARTBEAT_ONLINE = b"\x01"
+HEARTBEAT_OFFLINE = b"\x00"
+HEARTBEAT_TOPIC_ALIAS = 1  # MQTT v5 alias so repeat heartbeats carry an empty topic
 
-video_files = []
-player = None
-vlc_instance = vlc.Instance('--aout=alsa --no-audio')
+# One scheduled play: uint32 video index, float64 start_time. A play message is
+# a single entry; a batch is a 1-byte count followed by that many entries.
+PLAY_ENTRY = struct.Struct("!Id")
 
+log = logging.getLogger("player")
 
-looping_enabled = True
-looping_thread = None
-loop_lock = threading.Lock()
+video_files = []
+video_paths = []  # absolute bytes paths, parallel to video_files
+video_files_lock = threading.Lock()
+# Bumped on every disconnect; topic aliases have to be registered again on each connection
+connection_count = 0
+# Set by on_connect and cleared by on_disconnect; paho's is_connected() stays
+# true after a socket drop until the reconnect attempt starts
+mqtt_connected = False
+heartbeat_wake = threading.Event()  # set on (re)connect so a beat goes out at once
+player = None
+# Media for the index 0 loop, reused until that file changes
+loop_media = None
+loop_media_path = None
+player_playing = threading.Event()
+player_ended = threading.Event()
+vlc_instance = None
+
+# Everything the player thread reacts to: play commands from the MQTT thread as
+# (monotonic deadline, video index), and PLAYER_ENDED from VLC callbacks.
+# SimpleQueue.put is a single C call, so neither side waits on a Python lock.
+player_inbox = queue.SimpleQueue()
+PLAYER_ENDED = None
+
+def setup_logging():
+    # Records are still created on the calling thread, so skip collecting
+    # fields the format never uses
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    # Records are formatted and written by a listener thread, so the MQTT and
+    # playback threads never block on stdout (often a pipe to the cron log)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    log_queue = queue.Queue()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)  # flush queued records on exit
+
+def pin_thread(playback):
+    # Split the cores: MQTT and heartbeat threads on core 0, the player thread on
+    # the rest. VLC's decoder threads inherit the player thread's affinity and
+    # priority. A niceness is used rather than SCHED_FIFO so real-time decoding
+    # can't starve the heartbeats.
+    cpu_count = os.cpu_count() or 1
+    tid = threading.get_native_id()
+    try:
+        if cpu_count > 1:
+            os.sched_setaffinity(tid, set(range(1, cpu_count)) if playback else {0})
+        if playback:
+            os.setpriority(os.PRIO_PROCESS, tid, PLAYER_NICE)
+    except OSError as e:
+        log.warning("Could not set thread scheduling: %s", e)
 
 def send_heartbeat(client):
+    pin_thread(playback=False)
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.TopicAlias = HEARTBEAT_TOPIC_ALIAS
+    alias_connection = None
+    # Beats are due on a fixed monotonic grid, so publish time doesn't accumulate as drift
+    next_beat = time.monotonic()
     while True:
-        client.publish(MQTT_TOPIC_HEARTBEAT, CLIENT_ID)
-        time.sleep(HEARTBEAT_INTERVAL)
+        # While disconnected, skip the beat rather than queue a doomed publish
+        if mqtt_connected:
+            connection = connection_count
+            topic = "" if alias_connection == connection else HEARTBEAT_TOPIC
+            result = client.publish(topic, HEARTBEAT_ONLINE, qos=0, retain=False, properties=properties)
+            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                alias_connection = connection
+        next_beat = max(next_beat + HEARTBEAT_INTERVAL, time.monotonic())  # no catch-up bursts
+        if heartbeat_wake.wait(max(0.0, next_beat - time.monotonic())):
+            # Fresh connection: announce now and restart the grid from here
+            heartbeat_wake.clear()
+            next_beat = time.monotonic()
 
 def is_usb_mounted():
-    try:
-        with open("/proc/mounts", "r") as mounts:
-            return any(VIDEO_DIR in line for line in mounts)
-    except Exception:
-        return False
+    return os.path.ismount(VIDEO_DIR)
 
-def load_video_files():
-    global video_files
-    video_files = sorted([
-        f for f in os.listdir(VIDEO_DIR)
-        if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv'))
-    ])
-    print(f"Found videos: {video_files}")
+def is_video(name):
+    return os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
 
-def setup_player():
-    global player
-    player = vlc_instance.media_player_new()
-    print("Player setup complete")
-
-def play_video(index, start_time):
-    global looping_enabled
-
-    if 0 <= index < len(video_files):
-        with loop_lock:
-            looping_enabled = False  # disable looping temporarily
-
-        file_path = os.path.join(VIDEO_DIR, video_files[index])
-        print(f"Preparing to play video {file_path} at {start_time}")
-
-        player.stop()
-        media = vlc_instance.media_new(file_path)
-        player.set_media(media)
-        time.sleep(0.1)
-        player.play()
-        time.sleep(0.5)
-
-        wait_seconds = start_time - time.time()
-        if wait_seconds > 0:
-            print(f"Waiting {wait_seconds:.2f} seconds to start...")
-            time.sleep(wait_seconds)
-
-        print(f"Playing video: {file_path}")
-        while player.is_playing():
-            time.sleep(1)
-
-        print("Manual video finished. Resuming loop...")
-        time.sleep(1)
-
-        with loop_lock:
-            looping_enabled = True  # allow loop again
-
-    else:
-        print(f"Invalid index {index}, not playing.")
-
-def play_looping_index_zero():
-    def loop():
-        global looping_enabled
-        while True:
-            with loop_lock:
-                if not looping_enabled:
-                    time.sleep(1)
-                    continue
-
-            if len(video_files) == 0:
-                print("[Loop] No videos to play.")
-                time.sleep(5)
-                continue
+def video_path(name):
+    return os.fsencode(os.path.join(VIDEO_DIR, name))
 
-            file_path = os.path.join(VIDEO_DIR, video_files[0])
-            if not os.path.exists(file_path):
-                print("[Loop] Index 0 video missing.")
-                time.sleep(5)
+def load_video_files():
+    global video_files, video_paths
+    # is_file() comes from the directory entry's type, so no per-file stat
+    with os.scandir(VIDEO_DIR) as it:
+        entries = sorted(
+            (e.name, os.fsencode(e.path)) for e in it
+            if is_video(e.name) and e.is_file()
+        )
+    with video_files_lock:
+        video_files = [name for name, _ in entries]
+        video_paths = [path for _, path in entries]
+    log.info("Found videos: %s", video_files)
+
+def get_video_path(index):
+    with video_files_lock:
+        if 0 <= index < len(video_paths):
+            return video_paths[index]
+    return None
+
+def watch_video_dir():
+    # Keep video_files sorted as files are copied onto or removed from the USB
+    if INotify is None:
+        log.warning("inotify_simple not installed, video list will not auto-update")
+        return
+    inotify = INotify()
+    added = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+    removed = inotify_flags.DELETE | inotify_flags.MOVED_FROM
+    inotify.add_watch(VIDEO_DIR, added | removed)
+    while True:
+        for event in inotify.read():
+            name = event.name
+            if not is_video(name):
                 continue
+            # Same rule as load_video_files: a directory named like a video is skipped
+            is_file = event.mask & added and os.path.isfile(video_path(name))
+            with video_files_lock:
+                i = bisect.bisect_left(video_files, name)
+                present = i < len(video_files) and video_files[i] == name
+                if is_file and not present:
+                    video_files.insert(i, name)
+                    video_paths.insert(i, video_path(name))
+                elif event.mask & removed and present:
+                    del video_files[i]
+                    del video_paths[i]
+                else:
+                    continue
+            log.info("Video list changed (%s): %s", name, video_files)
 
-            print(f"[Loop] Playing {file_path}")
-            media = vlc_instance.media_new(file_path)
-            player.set_media(media)
-            player.play()
-            time.sleep(1)
-
-            while player.is_playing():
-                time.sleep(1)
+def setup_player():
+    global player, vlc_instance
+    vlc_instance = vlc.Instance(VLC_ARGS)
+    player = vlc_instance.media_player_new()
+    events = player.event_manager()
+    events.event_attach(vlc.EventType.MediaPlayerPlaying, on_player_playing)
+    events.event_attach(vlc.EventType.MediaPlayerEndReached, on_player_ended)
+    events.event_attach(vlc.EventType.MediaPlayerStopped, on_player_ended)
+    events.event_attach(vlc.EventType.MediaPlayerEncounteredError, on_player_ended)
+    player_ended.set()  # nothing playing yet, so the loop video starts right away
+    log.info("Player setup complete")
+
+def on_player_playing(event):
+    player_playing.set()
+
+def on_player_ended(event):
+    player_ended.set()
+    player_inbox.put(PLAYER_ENDED)
+
+def start_player():
+    # Returns once VLC fires MediaPlayerPlaying, False if it never does
+    player_playing.clear()
+    player_ended.clear()
+    player.play()
+    if not player_playing.wait(PLAY_START_TIMEOUT):
+        log.warning("VLC did not report playback in time")
+        player_ended.set()  # nothing will fire EndReached, fall back to the loop video
+        return False
+    return True
 
-            print("[Loop] Video ended, restarting...")
+def prefetch_video(file_path):
+    # WILLNEED starts readahead into the page cache, so VLC's first reads at the
+    # synchronized start don't wait on the USB stick. (SEQUENTIAL would only
+    # apply to this fd, not VLC's, so it isn't worth setting here.)
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def prepare_video(index):
+    # Runs PREPARE_LEAD before the deadline, so opening and parsing the media
+    # overlaps the wait and only set_media/play() are left for the deadline
+    file_path = get_video_path(index)
+    if file_path is None:
+        log.warning("Invalid index %s, not playing.", index)
+        return None
+    prefetch_video(file_path)
+    media = vlc_instance.media_new_path(file_path)
+    media.parse_with_options(vlc.MediaParseFlag.local, -1)
+    return media
+
+def play_video(media):
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Playing video: %s", media.get_mrl())
+    # set_media tears down the current input itself, so no separate stop()
+    player.set_media(media)
+    start_player()
+
+def play_loop_video():
+    file_path = get_video_path(0)
+    if file_path is None:
+        log.warning("[Loop] No videos to play.")
+        return False
 
-    global looping_thread
-    looping_thread = threading.Thread(target=loop, daemon=True)
-    looping_thread.start()
-    print("Started loop of index 0")
+    global loop_media, loop_media_path
+    if file_path != loop_media_path:
+        prefetch_video(file_path)
+        loop_media = vlc_instance.media_new_path(file_path)
+        loop_media_path = file_path
+        # VLC repeats the file itself; EndReached only fires after all repeats
+        loop_media.add_option(':input-repeat=65535')
+        loop_media.parse_with_options(vlc.MediaParseFlag.local, -1)
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("[Loop] Playing %s", os.fsdecode(file_path))
+    player.set_media(loop_media)
+    return start_player()
+
+def schedule_play(index, start_time):
+    # Deadlines use time.monotonic(): NTP disciplines its rate, so every screen
+    # counts down at the same speed, and queue timeouts wait on the same clock
+    delay = start_time - time.time()
+    if not math.isfinite(delay):
+        log.warning("Invalid start time %s for video %s, not playing.", start_time, index)
+        return
+    if delay > MAX_SCHEDULE_AHEAD:
+        log.warning("Start time for video %s is %g seconds away, clamping to %s", index, delay, MAX_SCHEDULE_AHEAD)
+        delay = MAX_SCHEDULE_AHEAD
+    player_inbox.put((time.monotonic() + delay, index))
+
+def run_player():
+    # The only thread that touches the player: starts scheduled videos at their
+    # deadline and puts the index 0 loop back on whenever playback ends, so no
+    # lock or looping flag is needed to hand the player back and forth
+    # Pending plays wait as (monotonic deadline, sequence, index) and move to
+    # ready as (deadline, sequence, prepared vlc.Media) once within PREPARE_LEAD,
+    # so a burst of commands doesn't parse and prefetch videos minutes early
+    waiting = []
+    ready = []
+    seq = itertools.count()
+    monotonic = time.monotonic  # bound once for the start spin
+    loop_retry_at = 0.0
+    pin_thread(playback=True)
+
+    def take(item):
+        if item is not PLAYER_ENDED:
+            deadline, index = item
+            if len(waiting) + len(ready) >= MAX_PENDING_PLAYS:
+                log.warning("Too many scheduled plays, dropping video %s", index)
+                return
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Scheduling video %s in %.2f seconds", index, deadline - time.monotonic())
+            heapq.heappush(waiting, (deadline, next(seq), index))
+
+    def take_safely(item):
+        # This is the only player thread, so one bad command must not end it
+        try:
+            take(item)
+        except Exception:
+            log.exception("Error scheduling %s", item)
 
-def on_connect(client, userdata, flags, rc):
-    print("Connected to MQTT Broker")
-    client.subscribe(MQTT_TOPIC_PLAY)
-    threading.Thread(target=send_heartbeat, args=(client,), daemon=True).start()
+    while True:
+        try:
+            while True:
+                take_safely(player_inbox.get_nowait())
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        if ready and ready[0][0] - now <= START_SPIN:
+            deadline, _, media = heapq.heappop(ready)
+            # Timed waits overshoot by a millisecond or more, so spin the last stretch
+            while monotonic() < deadline:
+                pass
+            try:
+                play_video(media)
+            except Exception:
+                log.exception("Error playing video")
+                player_ended.set()  # fall back to the loop video
+            continue
+
+        # One at a time, so a due start is checked again between preparations
+        if waiting and waiting[0][0] - now <= PREPARE_LEAD:
+            deadline, order, index = heapq.heappop(waiting)
+            try:
+                media = prepare_video(index)
+            except Exception:
+                log.exception("Error preparing video %s", index)
+                media = None
+            if media is not None:
+                heapq.heappush(ready, (deadline, order, media))
+            continue
+
+        # Read once: a VLC end event can set it at any moment
+        ended = player_ended.is_set()
+        if ended and now >= loop_retry_at:
+            try:
+                started = play_loop_video()
+            except Exception:
+                log.exception("[Loop] Error playing video")
+                started = False
+            if not started:
+                loop_retry_at = now + LOOP_RETRY_INTERVAL
+            continue
+
+        timeouts = []
+        if ready:
+            timeouts.append(ready[0][0] - now - START_SPIN)
+        if waiting:
+            timeouts.append(waiting[0][0] - now - PREPARE_LEAD)
+        if ended:
+            timeouts.append(loop_retry_at - now)
+        timeout = min(timeouts) if timeouts else None
+        try:
+            take_safely(player_inbox.get(timeout=None if timeout is None else max(0.0, timeout)))
+        except queue.Empty:
+            pass
+
+def tune_socket(client):
+    # Heartbeats are single small packets; send them without waiting on Nagle.
+    # Buffer sizes are left to the kernel's autotuning: paho 1.x only exposes
+    # the socket after connecting, too late to affect the TCP window scale.
+    sock = client.socket()
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError as e:
+        log.warning("Could not tune MQTT socket: %s", e)
+
+def on_connect(client, userdata, flags, rc, properties=None):
+    global mqtt_connected
+    # paho calls this for refused connections too; it retries on its own
+    if rc != 0:
+        log.warning("MQTT broker refused connection: %s", rc)
+        return
+    mqtt_connected = True
+    log.info("Connected to MQTT Broker")
+    tune_socket(client)
+    client.subscribe([(MQTT_TOPIC_PLAY, 0), (MQTT_TOPIC_PLAY_BATCH, 0)])
+    heartbeat_wake.set()
+
+def on_disconnect(client, userdata, rc, properties=None):
+    global connection_count, mqtt_connected
+    # Bumped here, before the next connection exists, so no heartbeat can go
+    # out on it with an alias the broker hasn't seen yet
+    mqtt_connected = False
+    connection_count += 1
+    log.warning("Disconnected from MQTT Broker: %s", rc)
+
+def on_play_batch(client, userdata, msg):
+    # Payload: 1-byte count, then count x PLAY_ENTRY
+    payload = msg.payload
+    try:
+        end = 1 + payload[0] * PLAY_ENTRY.size if payload else 0
+        if not payload or len(payload) < end:
+            log.error("Error parsing batch: %s, truncated payload", payload)
+            return
+        for index, start_time in PLAY_ENTRY.iter_unpack(memoryview(payload)[1:end]):
+            schedule_play(index, start_time)
+    except Exception as e:
+        log.error("Error parsing batch: %s, %s", payload, e)
 
 def on_message(client, userdata, msg):
+    payload = msg.payload
     try:
-        payload = msg.payload.decode()
-        parts = payload.split(",")
-        index = int(parts[0])
-        start_time = float(parts[1])
-        threading.Thread(target=play_video, args=(index, start_time), daemon=True).start()
+        if len(payload) == PLAY_ENTRY.size and not payload[:1].isdigit():
+            index, start_time = PLAY_ENTRY.unpack(payload)
+        else:
+            # "index,start_time" text, e.g. from mosquitto_pub
+            sep = payload.index(b",")
+            index = int(payload[:sep])
+            start_time = float(payload[sep + 1:])
+        schedule_play(index, start_time)
     except Exception as e:
-        print(f"Error parsing message: {msg.payload}, {e}")
+        log.error("Error parsing message: %s, %s", payload, e)
 
 def wait_for_usb_mount():
-    print("Waiting for USB mount...")
+    log.info("Waiting for USB mount...")
     timeout = 30
-    start = time.time()
-    while not is_usb_mounted():
-        if time.time() - start > timeout:
-            print("ERROR: USB failed to mount after 30 seconds.")
-            return False
-        print("  USB not mounted yet...")
-        time.sleep(1)
-    print("USB is mounted.")
+    deadline = time.monotonic() + timeout
+    # The kernel flags /proc/self/mounts with POLLPRI whenever the mount table
+    # changes, so we only re-check when something was actually (un)mounted
+    with open("/proc/self/mounts") as mounts:
+        poller = select.poll()
+        poller.register(mounts, select.POLLPRI)
+        while not is_usb_mounted():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                log.error("USB failed to mount after %s seconds.", timeout)
+                return False
+            log.debug("USB not mounted yet...")
+            poller.poll(remaining * 1000)
+    log.info("USB is mounted.")
     return True
 
 def main():
-    print(f"== Client Startup: {datetime.now().strftime('%c')} ==")
+    # Threads inherit the creating thread's affinity, so pin first: the log
+    # listener and inotify watcher then start on core 0 with the MQTT loop
+    pin_thread(playback=False)
+    setup_logging()
+    log.info("== Client Startup: %s ==", datetime.now().strftime('%c'))
 
     if not wait_for_usb_mount():
-        print("Exiting due to missing USB")
+        log.error("Exiting due to missing USB")
         return
 
     load_video_files()
+    threading.Thread(target=watch_video_dir, daemon=True).start()
     setup_player()
-    play_looping_index_zero()
+    threading.Thread(target=run_player, daemon=True).start()
+    log.info("Started player thread")
 
-    client = mqtt.Client()
+    client = mqtt.Client(transport="tcp", protocol=mqtt.MQTTv5)
     client.on_connect = on_connect
+    client.on_disconnect = on_disconnect
     client.on_message = on_message
+    client.message_callback_add(MQTT_TOPIC_PLAY_BATCH, on_play_batch)
+    client.will_set(HEARTBEAT_TOPIC, HEARTBEAT_OFFLINE, qos=1, retain=False)
+    client.reconnect_delay_set(MQTT_RECONNECT_MIN_DELAY, MQTT_RECONNECT_MAX_DELAY)
 
     try:
-        client.connect(MQTT_BROKER)
-        print("MQTT connect successful")
-        client.loop_forever()
+        # Keep retrying if the broker isn't up yet, e.g. while the brain is still booting
+        client.connect_async(MQTT_BROKER, keepalive=MQTT_KEEPALIVE)
+        log.info("Connecting to MQTT broker %s", MQTT_BROKER)
+        threading.Thread(target=send_heartbeat, args=(client,), daemon=True).start()
+        client.loop_forever(retry_first_connection=True)
     except Exception as e:
-        print(f"MQTT connection failed: {e}")
+        log.error("MQTT connection failed: %s", e)
 
 if __name__ == "__main__":
     main()